@@ -33,7 +33,25 @@ class BindError(Exception):
 #
 # This only applies to named functions. Python lambdas and non-function
 # callables do not have names.
+#
+# The derived name is cached on the function, where possible, as
+# ``__lisp_name__``. Since ``functools.wraps`` copies the cache along with the
+# function's other attributes, wrappers made by ``wrap_void`` and ``wrap_fn``
+# share their wrapped function's cached name. The cache is read from the
+# function's own ``__dict__``, and not through ``getattr``, so that a class does
+# not pick up the name cached on a class it inherits from.
 def lisp_name(fn):
+    name = getattr(fn, '__dict__', {}).get('__lisp_name__')
+    if name is None:
+        name = derive_lisp_name(fn)
+        try:
+            fn.__lisp_name__ = name
+        except AttributeError:
+            # Bound methods and builtins don't take new attributes.
+            pass
+    return name
+
+def derive_lisp_name(fn):
     name = fn.__name__
     if name == '<lambda>':
         raise BindError(f'Lambda {repr(fn)} has no name')
@@ -2,15 +2,43 @@
 class BindingError(Exception):
     pass
 
+# Marks a name with no binding in an environment's bindings. This is distinct
+# from every legal Actinide value, including nil.
+unbound = object()
+
 # A lookup table binding symbols to values. This may have a parent environment,
 # in which case lookups will look through to the parent environment if they are
 # not found in the current environment. This allows nested scopes.
-class Environment(dict):
+#
+# The bindings themselves are held in a plain dict, rather than in the
+# environment object, so that lookups stay on the dict's fast path.
+class Environment(object):
+    __slots__ = ('bindings', 'parent')
+
     # Creates an environment, optionally setting initial values and optionally
     # adding a parent to look in for values not found in this environment.
     def __init__(self, bindings=(), parent=None):
+        self.bindings = dict(bindings)
         self.parent = parent
-        self.update(bindings)
+
+    # Look up a binding in this environment only, raising ``KeyError`` if the
+    # name is not bound here.
+    def __getitem__(self, name):
+        return self.bindings[name]
+
+    # Sets a value in the current environment.
+    def __setitem__(self, name, value):
+        self.bindings[name] = value
+
+    # True if the name is bound in this environment, ignoring any parent
+    # environments.
+    def __contains__(self, name):
+        return name in self.bindings
+
+    # Look up a binding in this environment only, returning ``unbound`` if the
+    # name is not bound here.
+    def lookup(self, name):
+        return self.bindings.get(name, unbound)
 
     # Look up a binding in this environment, or in any parent environment.
     # Unlike ``[]``, this will continue into any parent environments, raising an
@@ -18,13 +46,59 @@ class Environment(dict):
     #
     # The value from the innermost environment containing the name will be
     # returned.
+    #
+    # Names looked up this way are mostly globals, found in the first
+    # environment searched, so that case is checked before walking the parents.
     def find(self, name):
-        if name in self:
-            return self[name]
-        if self.parent != None:
-            return self.parent.find(name)
-        raise BindingError(f'Variable {name} not bound')
+        value = self.bindings.get(name, unbound)
+        if value is not unbound:
+            return value
+        return find(self.parent, name)
 
     # Sets a value in the current environment.
     def define(self, name, value):
-        self[name] = value
+        self.bindings[name] = value
+
+# The environment created by applying a procedure. Rather than binding names in
+# a dict, a frame holds its values in a list, one slot per name bound by the
+# procedure. The slot for each name is fixed when the procedure is compiled, by
+# the procedure's scope (see ``evaluator.Scope``), and compiled code reads and
+# writes slots by index. A slot holding ``unbound`` has no value yet.
+class Frame(object):
+    __slots__ = ('scope', 'values', 'parent')
+
+    def __init__(self, scope, values, parent):
+        self.scope = scope
+        self.values = values
+        self.parent = parent
+
+    # Look up a binding in this frame only, returning ``unbound`` if the name is
+    # not bound here.
+    def lookup(self, name):
+        slot = self.scope.slots.get(name)
+        if slot is None:
+            return unbound
+        return self.values[slot]
+
+    # Look up a binding in this frame, or in any parent environment. See
+    # ``Environment.find``.
+    #
+    # As with environments, this frame's own slots are checked before walking
+    # the parents.
+    def find(self, name):
+        slot = self.scope.slots.get(name)
+        if slot is not None:
+            value = self.values[slot]
+            if value is not unbound:
+                return value
+        return find(self.parent, name)
+
+# Look up a binding in an environment or frame, or in any of its parents,
+# raising an exception if the name cannot be found in any of them.
+def find(env, name):
+    while env is not None:
+        value = env.lookup(name)
+        if value is not unbound:
+            return value
+        env = env.parent
+    raise BindingError(f'Variable {name} not bound')
@@ -1,3 +1,5 @@
+import weakref
+
 from .environment import *
 
 # Circular import. Hard to avoid: `eval` calls `lambda_`, `lambda_` eventually
@@ -5,6 +7,11 @@ from .environment import *
 # the module object to avoid problems with import order.
 from . import types as t
 
+# Except for ``Procedure``, which every call checks for. Since ``types`` imports
+# this module only after defining its types, ``Procedure`` always exists by the
+# time this runs, and binding it here saves an attribute lookup per call.
+Procedure = t.Procedure
+
 # ## EVALUATION
 #
 # The following system implements a continuation-passing interpreter for
@@ -17,6 +24,16 @@ from . import types as t
 # Because the evaluator itself is tail-recursive, tail calls are free in
 # Actinide - they do not cause the call stack to grow.
 #
+# Every form is compiled to its continuations exactly once. The values computed
+# at run time, including partially-evaluated argument lists, are kept on an
+# explicit stack owned by ``run`` rather than passed from continuation to
+# continuation.
+#
+# Continuations are plain Python closures. Instances of small classes with
+# ``__slots__`` and a ``__call__`` method would do the same job, but CPython
+# calls a closure noticeably faster than it dispatches to ``__call__``, and
+# every step of evaluation is such a call.
+#
 # In principle, this could expose ``call/cc``, but the need for that primitive
 # hasn't come up.
 #
@@ -37,70 +54,243 @@ from . import types as t
 class EvalError(Exception):
     pass
 
+# The value stack for a single run. Continuations yield values by pushing them
+# onto the stack, and consume values by popping them off. The stack also
+# records, in ``marks``, where the values of each list form currently being
+# evaluated begin (see ``apply``, below), and, in ``frames``, where to resume
+# when each procedure currently being called returns (see ``invoke``, below).
+class Stack(list):
+    __slots__ = ('marks', 'frames')
+
+    def __init__(self, values=()):
+        super().__init__(values)
+        self.marks = []
+        self.frames = []
+
 # Reduce a continuation to its final value.
 #
-# This iteratively calls the current continuation with the current arguments
-# until the current continuation is None, then exits, returning the final
-# arguments.
+# This iteratively calls the current continuation until the current
+# continuation is None. A None continuation ends a procedure body as well as the
+# whole run: if any procedure calls are in progress, the innermost one returns,
+# restoring the continuation and environments saved when it was called.
+# Otherwise, this exits, returning the values left on the stack.
 #
 # This trampoline exists to deal with the absence of tail call optimizations in
 # Python. By returning the next continuation rather than invoking it, we avoid
-# growing the Python call stack without bound.
+# growing the Python call stack without bound. Each trip through the loop costs
+# a Python call, so the continuation factories below avoid producing
+# continuations that do nothing but chain to another continuation.
 #
 # The result of evaluating a continuation is always a Python tuple. For
 # expressions, this tuple contains the value(s) produced by the expression. For
 # forms which do not produce a value, this returns the empty tuple.
 def run(continuation, env, macros, args=()):
-    while continuation is not None:
-        continuation, env, macros, *args = continuation(env, macros, *args)
-    return tuple(args)
+    stack = Stack(args)
+    frames = stack.frames
+    while True:
+        while continuation is not None:
+            continuation, env, macros = continuation(env, macros, stack)
+        if not frames:
+            return tuple(stack)
+        continuation, env, macros = frames.pop()
 
 # ## FLAT CONTINUATIONS
 #
 # These continuation factories and transformers produce continuations which
 # receive already-evaluated values, and which produce evaluated results.
+#
+# Continuations which take a single value, such as ``branch`` and ``bind``, pop
+# it from the top of the stack. The form evaluated before them must yield
+# exactly one value.
 
 # Returns a continuation which yields a single value, verbatim, and chains to a
 # known target continuation. This implements evaluation for literals.
+#
+# Programs are full of the same few literals - nil, the booleans, and small
+# integers - in the same positions, so continuations for those values are
+# shared between every site that would otherwise compile an identical one. The
+# cache holds them weakly, so it never outlives the code that uses them.
 def literal(value, continuation):
-    return lambda env, macros: (continuation, env, macros, value)
+    if not shared_literal_p(value):
+        return compile_literal(value, continuation)
+    # Keyed by type as well as value, as ``1 == #t`` in Python.
+    key = (type(value), value, continuation)
+    literal_ = shared_literals.get(key)
+    if literal_ is None:
+        literal_ = compile_literal(value, continuation)
+        shared_literals[key] = literal_
+    return literal_
+
+def compile_literal(value, continuation):
+    def literal_(env, macros, stack):
+        stack.append(value)
+        return (continuation, env, macros)
+    return literal_
+
+shared_literals = weakref.WeakValueDictionary()
+
+def shared_literal_p(value):
+    if value is None or value is True or value is False:
+        return True
+    return type(value) is int and -256 <= value <= 256
+
+# Returns a continuation which looks up a symbol, yields the result, and chains
+# to a known target continuation. This implements evaluation for variable
+# lookups.
+def symbol(symb, continuation, scope):
+    get = lookup(symb, scope)
+    def symbol_(env, macros, stack):
+        stack.append(get(env))
+        return (continuation, env, macros)
+    return symbol_
+
+# Returns a function which looks up a symbol in a given environment.
+#
+# Where the symbol is bound by an enclosing procedure, the lookup compiles to
+# an index into that procedure's frame. Otherwise, the symbol is looked up by
+# name, starting from the environment enclosing the outermost procedure.
+def lookup(symb, scope):
+    depth = 0
+    while scope is not None:
+        slot = scope.slots.get(symb)
+        if slot is not None:
+            if symb in scope.bound:
+                return local(depth, slot)
+            return defined_local(symb, depth, slot)
+        scope = scope.parent
+        depth += 1
+    return nonlocal_(symb, depth)
+
+# Returns the environment ``depth`` procedure frames out from ``env``. Lookups
+# in the current frame and its immediate parent, which are by far the most
+# common, are specialized below to avoid calling this.
+def outer(env, depth):
+    for _ in range(depth):
+        env = env.parent
+    return env
+
+# Returns a function which looks up a known slot of a known frame. This
+# implements lookups of names that are always bound, such as formal arguments.
+def local(depth, slot):
+    if depth == 0:
+        return lambda env: env.values[slot]
+    if depth == 1:
+        return lambda env: env.parent.values[slot]
+    return lambda env: outer(env, depth).values[slot]
+
+# As ``local``, but for names bound by ``define``. If the slot has not been
+# bound yet, the name is looked up in the environments enclosing the frame.
+def defined_local(symb, depth, slot):
+    if depth == 0:
+        def own_defined_local(env):
+            value = env.values[slot]
+            if value is unbound:
+                value = env.parent.find(symb)
+            return value
+        return own_defined_local
+
+    def defined_local_(env):
+        frame = outer(env, depth)
+        value = frame.values[slot]
+        if value is unbound:
+            value = frame.parent.find(symb)
+        return value
+    return defined_local_
 
-# Returns a continuation which looks up a symbol in an environment, yields the
-# result, and chains to a known target continuation. This implements evaluation
-# for variable lookups.
-def symbol(symb, continuation):
-    return lambda env, macros: (continuation, env, macros, env.find(symb))
+# Returns a function which looks up a symbol by name, skipping a known number of
+# procedure frames that cannot bind it.
+def nonlocal_(symb, depth):
+    if depth == 0:
+        return lambda env: env.find(symb)
+    if depth == 1:
+        return lambda env: env.parent.find(symb)
+    return lambda env: outer(env, depth).find(symb)
+
+# Returns a function which computes the value of a form in a given environment,
+# if the form is an operand: a symbol, a literal, or a quoted form. Evaluating
+# an operand always yields exactly one value, and never calls a procedure, so
+# operands can be evaluated directly by the continuations that use them rather
+# than through continuations of their own. For any other form, this returns
+# None.
+def operand(value, scope):
+    if t.symbol_p(value):
+        return lookup(value, scope)
+    if not t.cons_p(value):
+        return lambda env: value
+    if special_form_p(t.head(value), quote_number):
+        quoted, = take(t.tail(value), 1)
+        return lambda env: quoted
+    return None
+
+# If a form is a function application whose function and arguments are all
+# operands, returns functions computing each of them (see ``operand``).
+# Otherwise, returns None.
+def call_operands(value, scope):
+    if not t.cons_p(value) or not t.list_p(value):
+        return None
+    head = t.head(value)
+    if t.symbol_p(head) and head.id is not None and head.id < len(special_form_compilers):
+        return None
+    gets = [operand(element, scope) for element in t.flatten(value)]
+    if None in gets:
+        return None
+    return gets
+
+# Returns a continuation which yields the values of a sequence of operands (see
+# ``operand``), in order, and chains to a known target continuation.
+def operands(gets, continuation):
+    if len(gets) == 1:
+        get, = gets
+        def operand_(env, macros, stack):
+            stack.append(get(env))
+            return (continuation, env, macros)
+        return operand_
+
+    def operands_(env, macros, stack):
+        stack.extend([get(env) for get in gets])
+        return (continuation, env, macros)
+    return operands_
 
 # Unquotes the tail of a quoted form, yielding the form as a literal value
 # before chaining to the known target continuation. This implements unquoting of
 # quoted forms.
 def quote(quoted, continuation):
-    value, = t.flatten(quoted)
+    value, = take(quoted, 1)
     return literal(value, continuation)
 
 # Returns a continuation which yields a newly-created procedure, and chains to a
 # known target continuation. This implements evaluation for the tail of a lambda
 # form. (The head of the lambda form must be discarded before calling this
-# factory.)
-def lambda_(defn, symbols, continuation):
-    formals, body = t.flatten(defn)
-    def lambda__(env, macros):
-        proc = t.Procedure(body, formals, env, macros, symbols)
-        return (continuation, env, macros, proc)
+# factory.) The body of the lambda is compiled here, once, and not each time a
+# procedure is created.
+def lambda_(defn, symbols, continuation, scope):
+    formals, body = take(defn, 2)
+    code = t.Lambda(body, formals, symbols, scope)
+    def lambda__(env, macros, stack):
+        stack.append(Procedure(code, env, macros))
+        return (continuation, env, macros)
     return lambda__
 
 # Returns a continuation which takes a value and binds that value to a symbol in
 # a specific environment, then chains to a known target continuation. This
 # implements evaluation of the `define` special form, once the value is known.
-def bind(symbol, continuation):
-    def bind_(env, macros, value):
-        env.define(symbol, value)
+# Inside a procedure, the symbol always has a slot in the procedure's frame.
+def bind(symbol, continuation, scope):
+    if scope is not None:
+        slot = scope.slots[symbol]
+        def bind_local(env, macros, stack):
+            env.values[slot] = stack.pop()
+            return (continuation, env, macros)
+        return bind_local
+
+    def bind_(env, macros, stack):
+        env.define(symbol, stack.pop())
         return (continuation, env, macros)
     return bind_
 
-def macro_bind(symbol, continuation):
-    def macro_bind_(env, macros, value):
-        macros.define(symbol, value)
+def macro_bind(symbol, continuation, scope):
+    def macro_bind_(env, macros, stack):
+        macros.define(symbol, stack.pop())
         return (continuation, env, macros)
     return macro_bind_
 
@@ -110,67 +300,170 @@ def macro_bind(symbol, continuation):
 # this chains to the `on_false` continuation. In either case, the continuation
 # not chained to is discarded.
 def branch(on_true, on_false):
-    return lambda env, macros, val: (on_true if val else on_false, env, macros)
+    return lambda env, macros, stack: (on_true if stack.pop() else on_false, env, macros)
 
-# Returns a continuation which receives values, and appends them to the values
-# passed to this factory, before chaining to a known target continuation. This
-# implements intermediate evaluation of list forms, where part of the list is
-# already known, as well as splicing for forms that yield multiple values.
-def append(args, continuation):
-    return lambda env, macros, *tail: (continuation, env, macros, *args, *tail)
+# Returns a continuation which marks the top of the stack, then chains to a
+# known target continuation. This begins evaluation of a list form: every value
+# yielded by the elements of the list, including every value of elements which
+# yield multiple values, is pushed above the mark.
+def mark(continuation):
+    def mark_(env, macros, stack):
+        stack.marks.append(len(stack))
+        return (continuation, env, macros)
+    return mark_
 
-def begin(continuation):
-    return lambda env, macros, *args: (continuation, env, macros, *(args[-1:] if args else ()))
+# Returns a continuation which discards all of the values of a list form, then
+# chains to a known target continuation. This implements the forms of a `begin`
+# which are evaluated only for their effects.
+def discard(continuation):
+    def discard_(env, macros, stack):
+        del stack[stack.marks.pop():]
+        return (continuation, env, macros)
+    return discard_
 
 # Transforms a continuation which should receive function results into a
 # function call continuation. A function call continuation receives a function
 # and a sequence of arguments. If the function is a primitive function, the
 # reduction directly calls the function and chains to the wrapped continuation.
-# If the function is a procedure, this instead returns a continuation which will
-# invoke the procedure, then chain to the wrapped continuation.
-def invoke(continuation):
-    def invoke_(env, macros, fn, *args):
-        if isinstance(fn, t.Procedure):
-            return procedure_call(env, macros, fn, *args)
-        return builtin(env, macros, fn, *args)
-
-    def procedure_call(env, macros, fn, *args):
-        call_env = fn.invocation_environment(*args)
-        call_macros = Environment(parent=macros)
-        call_cont = fn.continuation
-        return_cont = tail_graft(continuation, env, macros, call_cont)
-        return (return_cont, call_env, call_macros)
-
-    def builtin(env, macros, fn, *args):
-        result = fn(*args)
-        return (continuation, env, macros, *result)
+# If the function is a procedure, this instead saves the wrapped continuation
+# and the current environments as a frame on the stack, then chains to the
+# procedure's body. When the body finishes, ``run`` resumes from the frame.
+#
+# Tail calls, whose wrapped continuation is None, save no frame: the procedure
+# returns directly to whatever its caller would have returned to, so tail calls
+# do not grow the stack.
+#
+# If the number of arguments is known when the call is compiled, this returns a
+# continuation specialized to that number, which pops the function and its
+# arguments off the stack directly. This is the case for most calls: see
+# ``arity``, below.
+def invoke(continuation, arity=None):
+    def invoke_(env, macros, stack):
+        start = stack.marks.pop()
+        fn = stack[start]
+        args = stack[start + 1:]
+        del stack[start:]
+        if isinstance(fn, Procedure):
+            return procedure_call(env, macros, stack, fn, args)
+        return builtin(env, macros, stack, fn, args)
+
+    def invoke_0(env, macros, stack):
+        stack.marks.pop()
+        fn = stack.pop()
+        if isinstance(fn, Procedure):
+            return procedure_call(env, macros, stack, fn, ())
+        stack.extend(fn())
+        return (continuation, env, macros)
+
+    def invoke_1(env, macros, stack):
+        stack.marks.pop()
+        a = stack.pop()
+        fn = stack.pop()
+        if isinstance(fn, Procedure):
+            return procedure_call(env, macros, stack, fn, (a,))
+        stack.extend(fn(a))
+        return (continuation, env, macros)
+
+    def invoke_2(env, macros, stack):
+        stack.marks.pop()
+        b = stack.pop()
+        a = stack.pop()
+        fn = stack.pop()
+        if isinstance(fn, Procedure):
+            return procedure_call(env, macros, stack, fn, (a, b))
+        stack.extend(fn(a, b))
+        return (continuation, env, macros)
+
+    def invoke_3(env, macros, stack):
+        stack.marks.pop()
+        c = stack.pop()
+        b = stack.pop()
+        a = stack.pop()
+        fn = stack.pop()
+        if isinstance(fn, Procedure):
+            return procedure_call(env, macros, stack, fn, (a, b, c))
+        stack.extend(fn(a, b, c))
+        return (continuation, env, macros)
+
+    def procedure_call(env, macros, stack, fn, args):
+        return enter(fn, args, continuation, env, macros, stack)
+
+    def builtin(env, macros, stack, fn, args):
+        stack.extend(fn(*args))
+        return (continuation, env, macros)
+
+    specialized = (invoke_0, invoke_1, invoke_2, invoke_3)
+    if arity is not None and arity < len(specialized):
+        return specialized[arity]
     return invoke_
 
-# Continuation transformer. Given a guarded continuation, and a graft
-# continuation and environment, if the graft continuation is None then this
-# returns the guarded continuation unchanged. Otherwise, this replaces the
-# guarded continuation with a guard.
-#
-# The guard calls guarded continuation when applied, but if the guarded
-# continuation chains to None, the guard replaces the returned continuation and
-# environment with the graft continuation and environment. This handles
-# environment restoration after a function call.
-def tail_graft(continuation, environment, macros, guarded):
-    # Tail call magic: if we're not going to transition to another continuation,
-    # don't bother grafting environment recovery on.
-    if continuation is None:
-        return guarded
-
-    def guard(env, macros, *args):
-        next, env, macros, *args = guarded(env, macros, *args)
-        if next is None:
-            return (continuation, environment, macros, *args)
-        return (
-            tail_graft(continuation, environment, macros, next),
-            env, macros, *args,
-        )
-
-    return guard
+# Enters the body of a procedure, saving a frame to return to the target
+# continuation unless the call is a tail call. See ``invoke``.
+#
+# Each call gets a fresh macro environment, so that macros defined by the
+# procedure's body don't outlive the call. Bodies that can't define macros
+# share the caller's instead, which saves allocating one per call.
+def enter(fn, args, continuation, env, macros, stack):
+    call_env = fn.invocation_environment(args)
+    call_macros = Environment(parent=macros) if fn.code.defines_macros else macros
+    if continuation is not None:
+        stack.frames.append((continuation, env, macros))
+    return (fn.continuation, call_env, call_macros)
+
+# Returns a continuation which calls a function with arguments, where the
+# function and all of its arguments are operands (see ``operand``), then chains
+# to a known target continuation. The operands are evaluated directly, so
+# unlike ``apply`` and ``invoke``, this uses neither a mark nor any
+# intermediate continuations. Calls with one or two arguments, which are the
+# most common, are specialized.
+def call(gets, continuation):
+    get_fn, *get_args = gets
+
+    if len(get_args) == 1:
+        get_a, = get_args
+        def call_1(env, macros, stack):
+            fn = get_fn(env)
+            a = get_a(env)
+            if isinstance(fn, Procedure):
+                return enter(fn, (a,), continuation, env, macros, stack)
+            stack.extend(fn(a))
+            return (continuation, env, macros)
+        return call_1
+
+    if len(get_args) == 2:
+        get_a, get_b = get_args
+        def call_2(env, macros, stack):
+            fn = get_fn(env)
+            a = get_a(env)
+            b = get_b(env)
+            if isinstance(fn, Procedure):
+                return enter(fn, (a, b), continuation, env, macros, stack)
+            stack.extend(fn(a, b))
+            return (continuation, env, macros)
+        return call_2
+
+    def call_(env, macros, stack):
+        fn = get_fn(env)
+        args = [get(env) for get in get_args]
+        if isinstance(fn, Procedure):
+            return enter(fn, args, continuation, env, macros, stack)
+        stack.extend(fn(*args))
+        return (continuation, env, macros)
+    return call_
+
+# Returns the number of arguments in a function application, if it is known
+# before the application is evaluated, or None otherwise. The number is known
+# if the function and every argument each yield exactly one value; since a form
+# which is itself a function application may yield any number of values, that
+# is only guaranteed for forms which are not.
+def arity(value):
+    forms = t.flatten(value)
+    for form in forms:
+        if t.cons_p(form):
+            head = t.head(form)
+            if not (special_form_p(head, quote_number) or special_form_p(head, lambda_number)):
+                return None
+    return len(forms) - 1
 
 # ## RECURSIVE CONTINUATIONS
 #
@@ -184,28 +477,36 @@ def tail_graft(continuation, environment, macros, guarded):
 # This is the heart of the continuation-passing transformation. Every valid form
 # can be translated into continuation-passing form throught this factory. This
 # handles literals, symbols, special forms, and function application.
-def eval(value, symbols, continuation):
-    if t.symbol_p(value):
-        return symbol(value, continuation)
-    if t.nil_p(value) or not t.cons_p(value):
-        return literal(value, continuation)
+#
+# The ``scope`` describes the frames of the procedures enclosing the form, if
+# any. See ``Scope``, below.
+#
+# Forms are dispatched on their type, using ``form_compilers`` (below): symbols
+# and conses have compilers of their own, and every other value is a literal.
+def eval(value, symbols, continuation, scope=None):
+    compiler = form_compilers.get(type(value), literal_form)
+    return compiler(value, symbols, continuation, scope)
+
+def symbol_form(value, symbols, continuation, scope):
+    return symbol(value, continuation, scope)
+
+def literal_form(value, symbols, continuation, scope):
+    return literal(value, continuation)
+
+def cons_form(value, symbols, continuation, scope):
     if not t.list_p(value):
         raise EvalError("Cannot evaluate a dotted pair")
     # Special forms (all of which begin with a special symbol, discarded here)
-    if t.head(value) == symbols['if']:
-        return if_(t.tail(value), symbols, continuation)
-    if t.head(value) == symbols['define']:
-        return define(t.tail(value), symbols, continuation, bind)
-    if t.head(value) == symbols['define-macro']:
-        return define(t.tail(value), symbols, continuation, macro_bind)
-    if t.head(value) == symbols['lambda']:
-        return lambda_(t.tail(value), symbols, continuation)
-    if t.head(value) == symbols['quote']:
-        return quote(t.tail(value), continuation)
-    if t.head(value) == symbols['begin']:
-        return apply(t.tail(value), symbols, begin(continuation))
+    head = t.head(value)
+    if t.symbol_p(head):
+        number = head.id
+        if number is not None and number < len(special_form_compilers):
+            return special_form_compilers[number](t.tail(value), symbols, continuation, scope)
     # Ran out of alternatives, must be a function application
-    return apply(value, symbols, invoke(continuation))
+    gets = call_operands(value, scope)
+    if gets is not None:
+        return call(gets, continuation)
+    return apply(value, symbols, invoke(continuation, arity(value)), scope)
 
 # Returns a continuation which fully evaluates a `(define symbol expr)` form,
 # before chaining to a known target continuation. First, the returned
@@ -213,15 +514,14 @@ def eval(value, symbols, continuation):
 # continuation`. The result of this evaluation is chained to a `bind`
 # continuation, to store the result of evaluation in the target environment.
 # Finally, the `bind` continuation chains to the target continuation.
-def define(value, symbols, continuation, bind):
-    symb, expr = t.flatten(value)
+def define(value, symbols, continuation, scope, bind):
+    symb, expr = take(value, 2)
 
     if not t.symbol_p(symb):
         raise RuntimeError(f"Argument to define not a symbol: {t.display(symb, symbols)}")
 
-    bind_cont = bind(symb, continuation)
-    eval_cont = eval(expr, symbols, bind_cont)
-    return lambda env, macros: (eval_cont, env, macros)
+    bind_cont = bind(symb, continuation, scope)
+    return eval(expr, symbols, bind_cont, scope)
 
 # Returns a continuation which fully evaluates an `(if cond if-true if-false)`
 # form, before chaining to a known target continuation. First, the returned
@@ -229,27 +529,216 @@ def define(value, symbols, continuation, bind):
 # construct the continuation), which chains to a `branch` continuation
 # containing continuations for the `if-true` and `if-false` epxressions. The
 # `if-true` and `if-false` continuations each chain to the target continuation.
-def if_(value, symbols, continuation):
-    cond, if_true, if_false = t.flatten(value)
+#
+# Conditions which are operands, or calls made up only of operands, are
+# evaluated by the branching continuation itself. See ``branch_call``.
+def if_(value, symbols, continuation, scope):
+    cond, if_true, if_false = take(value, 3)
 
-    if_true_cont = eval(if_true, symbols, continuation)
-    if_false_cont = eval(if_false, symbols, continuation)
+    if_true_cont = eval(if_true, symbols, continuation, scope)
+    if_false_cont = eval(if_false, symbols, continuation, scope)
     branch_cont = branch(if_true_cont, if_false_cont)
 
-    return eval(cond, symbols, branch_cont)
+    get = operand(cond, scope)
+    if get is not None:
+        return lambda env, macros, stack: (if_true_cont if get(env) else if_false_cont, env, macros)
+    gets = call_operands(cond, scope)
+    if gets is not None:
+        return branch_call(gets, if_true_cont, if_false_cont, call(gets, branch_cont))
+
+    return eval(cond, symbols, branch_cont, scope)
+
+# Returns a continuation which calls a function with operand arguments, as
+# ``call`` does, and branches on the result, as ``branch`` does. If the function
+# is a builtin, its result is branched on directly, without going through the
+# stack; the result must be exactly one value. Otherwise, this falls back to
+# ``call_cont``, which calls the procedure and then branches.
+def branch_call(gets, on_true, on_false, call_cont):
+    get_fn, *get_args = gets
+
+    if len(get_args) == 2:
+        get_a, get_b = get_args
+        def branch_call_2(env, macros, stack):
+            fn = get_fn(env)
+            if isinstance(fn, Procedure):
+                return call_cont(env, macros, stack)
+            value, = fn(get_a(env), get_b(env))
+            return (on_true if value else on_false, env, macros)
+        return branch_call_2
+
+    def branch_call_(env, macros, stack):
+        fn = get_fn(env)
+        if isinstance(fn, Procedure):
+            return call_cont(env, macros, stack)
+        value, = fn(*[get(env) for get in get_args])
+        return (on_true if value else on_false, env, macros)
+    return branch_call_
 
 # Returns a continuation which fully evaluates the elements of a list, before
-# chaining to a target continuation. If this is applied to an empty list, the
-# returned continuation accepts arbitrary arguments and chains to the target
-# continuation with those arguments. Otherwise, this evaluates the head of the
-# list (recursively, using `eval` to prepare the continuation), then chains to
-# an `append` continuation to glue the result onto the result of recursively
-# calling `apply` on the tail of the list.
-def apply(list, symbols, continuation):
-    if t.nil_p(list):
-        return lambda env, macros, *args: (continuation, env, macros, *args)
-    tail_cont = apply(t.tail(list), symbols, continuation)
-    return lambda env, macros, *args: (
-        eval(t.head(list), symbols, append(args, tail_cont)),
-        env, macros,
+# chaining to a target continuation. The returned continuation marks the stack,
+# then evaluates each element of the list in turn (using `eval` to prepare the
+# continuations), leaving their values on the stack above the mark. The target
+# continuation is responsible for consuming those values and the mark.
+#
+# The whole chain is compiled once, when `apply` is called, and not each time
+# the resulting continuation runs. The list is flattened once, and its elements
+# compiled from last to first, so that each element's continuation can chain to
+# the next; this compiles arbitrarily long lists without recursing. Each run of
+# consecutive operands (see ``operand``) is compiled to a single continuation.
+def apply(list, symbols, continuation, scope):
+    gets = []
+    for element in reversed(t.flatten(list)):
+        get = operand(element, scope)
+        if get is not None:
+            gets.append(get)
+            continue
+        if gets:
+            continuation = operands(gets[::-1], continuation)
+            gets = []
+        continuation = eval(element, symbols, continuation, scope)
+    if gets:
+        continuation = operands(gets[::-1], continuation)
+    return mark(continuation)
+
+# Returns a continuation which fully evaluates a `(begin form ...)` form, before
+# chaining to a known target continuation. Every form but the last is evaluated
+# for its effects, and its values are discarded; the last form chains directly
+# to the target continuation, and yields the values of the whole `begin` form.
+#
+# Since the last form inherits the target continuation, a function call in that
+# position is still a tail call: a procedure whose body ends with a call to
+# itself, even inside a `begin`, runs in constant space.
+def begin(value, symbols, continuation, scope):
+    forms = t.flatten(value)
+    if not forms:
+        return continuation
+    *effects, last = forms
+    continuation = eval(last, symbols, continuation, scope)
+    if not effects:
+        return continuation
+    continuation = discard(continuation)
+    for form in reversed(effects):
+        continuation = eval(form, symbols, continuation, scope)
+    return mark(continuation)
+
+# Destructures the tail of a special form, which must have exactly ``count``
+# elements, by walking its conses directly. (The tail is already known to be a
+# proper list.) Raises an EvalError if the form has the wrong number of
+# elements.
+def take(value, count):
+    if count == 1:
+        if t.cons_p(value) and t.nil_p(t.tail(value)):
+            return (t.head(value),)
+    elif count == 2:
+        if t.cons_p(value):
+            first, rest = t.head(value), t.tail(value)
+            if t.cons_p(rest) and t.nil_p(t.tail(rest)):
+                return (first, t.head(rest))
+    elif count == 3:
+        if t.cons_p(value):
+            first, rest = t.head(value), t.tail(value)
+            if t.cons_p(rest):
+                second, rest = t.head(rest), t.tail(rest)
+                if t.cons_p(rest) and t.nil_p(t.tail(rest)):
+                    return (first, second, t.head(rest))
+    raise EvalError(f"Expected {count} elements in special form, got {len(t.flatten(value))}")
+
+# ## SCOPES
+#
+# Procedure bodies are compiled against a scope, which records the names bound
+# in the procedure's frame: its formal arguments, plus any names the body binds
+# using `define`. Since `define` is the only way to bind a name in a frame, and
+# since programs are fully expanded before they are compiled, every such name
+# can be found by scanning the body before compiling it. References to names in
+# a scope compile to indexes into the frame (see ``environment.Frame``), rather
+# than to lookups by name.
+#
+# Names bound only by `define` may not have a value yet when they are
+# referenced. Those references fall back to looking the name up in the
+# environments enclosing the frame, exactly as a lookup by name would.
+class Scope(object):
+    __slots__ = ('slots', 'bound', 'unbound', 'parent')
+
+    def __init__(self, formals, tail_formal, defined, parent):
+        names = [*formals, tail_formal] if tail_formal else [*formals]
+        self.slots = {name: slot for slot, name in enumerate(names)}
+        self.bound = frozenset(names)
+        defined = [name for name in dict.fromkeys(defined) if name not in self.slots]
+        for slot, name in enumerate(defined, len(names)):
+            self.slots[name] = slot
+        self.unbound = (unbound,) * len(defined)
+        self.parent = parent
+
+# Yields every list form in a procedure body which the body itself evaluates:
+# the whole body, other than quoted forms and the bodies of nested procedures
+# (which are evaluated by procedures of their own). This may yield forms that
+# are never actually evaluated, such as data that merely looks like code.
+def body_forms(body):
+    forms = [body]
+    while forms:
+        form = forms.pop()
+        if not t.cons_p(form):
+            continue
+        head = t.head(form)
+        if special_form_p(head, quote_number) or special_form_p(head, lambda_number):
+            continue
+        yield form
+        while t.cons_p(form):
+            forms.append(t.head(form))
+            form = t.tail(form)
+
+# Finds every name that a procedure body may bind with `define`. This may find
+# names that the body never actually binds; that only costs a slot in the
+# frame.
+def defined_names(body):
+    names = []
+    for form in body_forms(body):
+        if special_form_p(t.head(form), define_number) and t.cons_p(t.tail(form)):
+            name = t.head(t.tail(form))
+            if t.symbol_p(name):
+                names.append(name)
+    return names
+
+# True if a procedure body may bind a macro with `define-macro`.
+def defines_macros(body):
+    return any(
+        special_form_p(t.head(form), define_macro_number)
+        for form in body_forms(body)
     )
+
+# Form compilers, keyed by the type of form each compiles. See ``eval``.
+form_compilers = {
+    t.Symbol: symbol_form,
+    t.Cons: cons_form,
+}
+
+# Special form compilers, keyed by the name of the symbol introducing each form.
+# Each receives the tail of the form, the symbol table, the target
+# continuation, and the enclosing scope, and returns a continuation for the
+# whole form.
+special_forms = {
+    'if': if_,
+    'define': lambda value, symbols, continuation, scope: define(value, symbols, continuation, scope, bind),
+    'define-macro': lambda value, symbols, continuation, scope: define(value, symbols, continuation, scope, macro_bind),
+    'lambda': lambda_,
+    'quote': lambda value, symbols, continuation, scope: quote(value, continuation),
+    'begin': begin,
+}
+
+# The same compilers, indexed by the number of the symbol for each form's name.
+# Every symbol table interns these names before any others, in this order; see
+# ``symbol_table.SymbolTable``.
+special_form_compilers = tuple(special_forms.values())
+
+# The numbers of the symbols for individual special forms. Since these are the
+# same in every symbol table, code that looks for a particular special form
+# compares numbers, rather than looking the form's symbol up by name.
+special_form_numbers = {name: number for number, name in enumerate(special_forms)}
+define_number = special_form_numbers['define']
+define_macro_number = special_form_numbers['define-macro']
+lambda_number = special_form_numbers['lambda']
+quote_number = special_form_numbers['quote']
+
+# True if a value is the symbol for the special form with the given number.
+def special_form_p(value, number):
+    return t.symbol_p(value) and value.id == number
@@ -12,44 +12,73 @@ class ExpansionError(Exception):
 # their longhand equivalents (``(define a (lambda (b c) body)))``).
 #
 # Because this deals with unevaluated programs, this algorithm can safely
-# recurse: the input depth simply isn't that large.
+# recurse into nested forms: the input depth simply isn't that large. The
+# elements of a single list are expanded iteratively, however, as lists can be
+# long.
+#
+# Forms with special syntax are dispatched by the name of their head symbol,
+# using ``expanders`` (below).
+#
+# Macros can return the same subform more than once, as in ``(begin ,x ,x)``,
+# so the expansion of each form is remembered, by identity, for the duration of
+# a single top-level expansion. Only expansions which called no macros are
+# remembered: a macro may have side effects, or generate fresh names, so each
+# appearance of a form which calls one is expanded separately.
 def expand(form, symbols, macros):
-    if nil_p(form) or not cons_p(form):
-        return form
-    if head(form) == symbols['quote']:
+    return expand_form(form, symbols, macros, Memo())
+
+# The expansions remembered during a single top-level expansion, keyed by the
+# id of each expanded form, along with a count of the macros called so far.
+class Memo(dict):
+    __slots__ = ('macro_calls',)
+
+    def __init__(self):
+        super().__init__()
+        self.macro_calls = 0
+
+def expand_form(form, symbols, macros, memo):
+    if not cons_p(form):
         return form
-    if head(form) == symbols['if']:
-        form = expand_if(form)
-    elif head(form) == symbols['define']:
-        form = expand_define(form, symbols)
-    elif head(form) == symbols['define-macro']:
-        form = expand_define(form, symbols)
-    elif head(form) == symbols['lambda']:
-        form = expand_lambda(form, symbols)
-    elif head(form) == symbols['quasiquote']:
-        form = expand_quasiquote(form, symbols)
-    elif symbol_p(head(form)) and head(form) in macros:
-        form = expand_macro(form, symbols, macros)
-    form = expand_subforms(form, symbols, macros)
+    entry = memo.get(id(form))
+    if entry is not None:
+        return entry[1]
+    macro_calls = memo.macro_calls
+    expansion = expand_cons(form, symbols, macros, memo)
+    if memo.macro_calls == macro_calls:
+        # Holding on to the form keeps its id from being reused during
+        # expansion.
+        memo[id(form)] = (form, expansion)
+    return expansion
+
+def expand_cons(form, symbols, macros, memo):
+    first = head(form)
+    if symbol_p(first):
+        if first is symbols['quote']:
+            return form
+        expander = expanders.get(first.value)
+        if expander is not None and first is symbols[first.value]:
+            form = expander(form, symbols)
+        elif first in macros:
+            form = expand_macro(form, symbols, macros, memo)
+    form = expand_subforms(form, symbols, macros, memo)
     return form
 
-# Recursively expand subforms in an already-expanded top-level form.
-def expand_subforms(list, symbols, macros):
-    if nil_p(list):
-        return nil
-    if not cons_p(list):
-        return list
-    head, tail = uncons(list)
-    return cons(
-        expand(head, symbols, macros),
-        expand_subforms(tail, symbols, macros),
-    )
+# Expand each subform in an already-expanded top-level form.
+def expand_subforms(form, symbols, macros, memo):
+    expanded = []
+    while cons_p(form):
+        expanded.append(expand_form(head(form), symbols, macros, memo))
+        form = tail(form)
+    # form is now nil, or the tail of a dotted list.
+    for subform in reversed(expanded):
+        form = cons(subform, form)
+    return form
 
 # Expand an `if` form.
 #
 # (if COND TRUE)
 #   => (if COND TRUE nil)
-def expand_if(form):
+def expand_if(form, symbols):
     head, form = uncons(form)
     cond, form = uncons(form)
     true, form = uncons(form)
@@ -96,34 +125,55 @@ def expand_quasiquote(form, symbols):
     body, form = uncons(form)
     return expand_quasiquoted(body, symbols)
 
+# The quasiquoted list is walked iteratively, and its expansion built from the
+# end backwards, so only nested lists recurse. Each element expands to a
+# ``cons`` onto the expansion of the rest of the list, except for runs of
+# ``unquote-splicing`` forms, which expand to a single ``append``.
 def expand_quasiquoted(form, symbols):
-    if nil_p(form):
-        return form
-    if not cons_p(form):
-        return list(symbols['quote'], form)
-    first, rest = uncons(form)
-    if first == symbols['unquote']:
-        next, rest = uncons(rest)
-        return next
-    if not nil_p(first) and cons_p(first):
-        candidate, body = uncons(first)
-        if candidate == symbols['unquote-splicing']:
-            next, unquote_next = uncons(body)
-            return list(
-                symbols['append'],
-                next,
-                expand_quasiquoted(rest, symbols),
-            )
-    return list(
-        symbols['cons'],
-        expand_quasiquoted(first, symbols),
-        expand_quasiquoted(rest, symbols),
-    )
+    elements = []
+    while cons_p(form):
+        first, rest = uncons(form)
+        if first is symbols['unquote']:
+            form, unquote_next = uncons(rest)
+            break
+        if cons_p(first) and head(first) is symbols['unquote-splicing']:
+            next, unquote_next = uncons(tail(first))
+            elements.append((True, next))
+        else:
+            elements.append((False, expand_quasiquoted(first, symbols)))
+        form = rest
+    else:
+        if not nil_p(form):
+            form = list(symbols['quote'], form)
+
+    spliced = []
+    for splice, element in reversed(elements):
+        if splice:
+            spliced.append(element)
+            continue
+        if spliced:
+            form = list(symbols['append'], *reversed(spliced), form)
+            spliced = []
+        form = list(symbols['cons'], element, form)
+    if spliced:
+        form = list(symbols['append'], *reversed(spliced), form)
+    return form
 
 # Expands macro definitions, iterating until no further expansion is possible.
-def expand_macro(form, symbols, macros):
+def expand_macro(form, symbols, macros, memo):
+    memo.macro_calls += 1
     macro, args = uncons(form)
     macro_body = macros[macro]
     args = flatten(args)
     expansion, = macro_body(*args)
-    return expand(expansion, symbols, macros)
+    return expand_form(expansion, symbols, macros, memo)
+
+# Expanders for forms with special syntax, keyed by the name of the symbol
+# introducing each form.
+expanders = {
+    'if': expand_if,
+    'define': expand_define,
+    'define-macro': expand_define,
+    'lambda': expand_lambda,
+    'quasiquote': expand_quasiquote,
+}
@@ -1,5 +1,3 @@
-import io
-
 from .builtin import Registry
 
 An = Registry()
@@ -15,27 +13,76 @@ An = Registry()
 # A port. Under the hood, this wraps a Python file-like object in character
 # mode, and guarantees support for peek and other operations needed by the
 # Actinide runtime.
+#
+# Input is read from the file a line at a time, into ``buffer``, and handed out
+# from there starting at ``position``. Reads from the buffer advance the
+# position, rather than slicing off the characters read, so that the tokenizer
+# can match tokens against the buffer in place and consume them by moving the
+# position. Reading whole lines keeps interactive input responsive: the port
+# never waits for more input than the line the user has just entered.
+#
+# A port may also be created with input already in its buffer, which is handed
+# out before anything is read from the file. A port with no file at all reads
+# only its initial buffer.
 class Port(object):
-    def __init__(self, file):
+    __slots__ = ('file', 'buffer', 'position')
+
+    def __init__(self, file=None, buffer=''):
         self.file = file
-        self.peek_buffer = ''
+        self.buffer = buffer
+        self.position = 0
+
+    # Replace the buffer with the next chunk of input from the underlying file,
+    # returning it. This returns the empty string once input is exhausted.
+    # Subclasses may override this to read input from other sources.
+    def fill(self):
+        if self.file is None:
+            self.buffer = ''
+        else:
+            self.buffer = self.file.readline()
+        self.position = 0
+        return self.buffer
+
+    # Add more input from the underlying file to the end of the buffer, keeping
+    # any unconsumed input already in it, and returning the input added. This
+    # returns the empty string once input is exhausted.
+    #
+    # If ``until`` is given, this keeps reading chunks until it reads one
+    # containing any of the characters in ``until``, or runs out of input. The
+    # chunks are collected and joined once, rather than appended to the buffer
+    # one at a time, so that input spanning many chunks is copied once.
+    def extend(self, until=None):
+        chunks = [self.buffer[self.position:]]
+        while True:
+            chunk = self.fill()
+            chunks.append(chunk)
+            if not chunk or until is None or any(char in chunk for char in until):
+                break
+        self.buffer = ''.join(chunks)
+        self.position = 0
+        return self.buffer[len(chunks[0]):]
 
     # Read up to ``n`` bytes from the port without consuming them.
     def peek(self, n):
-        if not self.peek_buffer:
-            self.peek_buffer = self.file.read(n)
-        return self.peek_buffer
+        if self.position >= len(self.buffer):
+            self.fill()
+        return self.buffer[self.position:self.position + n]
 
     # Read up to ``n`` bytes from the port, consuming them.
     def read(self, n):
-        if self.peek_buffer:
-            read_result, self.peek_buffer = self.peek_buffer[:n], self.peek_buffer[n:]
-            return read_result
-        return self.file.read(n)
+        if self.position >= len(self.buffer):
+            self.fill()
+        result = self.buffer[self.position:self.position + n]
+        self.position += len(result)
+        return result
 
     # Read all remaining input, consuming it.
     def read_fully(self):
-        return self.peek_buffer + self.file.read()
+        chunks = [self.buffer[self.position:]]
+        while self.fill():
+            chunks.append(self.buffer)
+        self.position = len(self.buffer)
+        return ''.join(chunks)
 
 # Read at least 1 and up to ``n`` characters from a port. This consumes them
 # from the port: they are no longer available to future peeks or reads. ``n``
@@ -57,6 +104,9 @@ def peek_port(port, n):
     return port.peek(n)
 
 # Create an input port from a string.
+#
+# The whole string is already in memory, so the port starts out with all of it
+# in its buffer, rather than reading it back out of a file one line at a time.
 @An.fn
 def string_to_input_port(string):
-    return Port(io.StringIO(string))
+    return Port(buffer=string)
@@ -2,8 +2,9 @@
 #
 # Reads one Actinide form and parses it.
 
+import functools
 from decimal import Decimal, InvalidOperation
-from .tokenizer import read_token
+from .tokenizer import read_token, syntax_tokens, open_paren, close_paren, dot
 from .types import *
 
 # Raised if the reader encounters invalid syntax in the underlying port.
@@ -20,94 +21,110 @@ EOF = Symbol('#<end-of-input>')
 # Any symbols read will be resolved using the passed symbol table (from the
 # ``symbol_table`` module), to implement interning.
 #
-# This uses a simple recursive descent algorithm to read forms. If the first
-# token is a ``(``, this recursively reads forms until it encounters a trailing
-# ``)``, and builds a list (or a dotted pair) out of the forms read. Otherwise,
-# this reads the atom found.
+# This reads forms iteratively, so that deeply-nested forms don't exhaust the
+# Python stack. Lists and quoted forms which have been started, but not yet
+# finished, are kept on an explicit stack of partial forms (see ``Partial``),
+# innermost last. Each form read is added to the innermost partial form; when a
+# partial form is finished, it is popped, and becomes a form in its own right.
+# The form read is complete once the stack is empty.
 def read(port, symbols):
-    head = read_token(port)
-    if head is None:
-        return EOF
-    if head == ')':
-        raise SyntaxError("Unexpected ')'")
-    if head == '(':
-        return read_list(port, symbols)
-    return read_atom(head, port, symbols)
-
-# Reads the body of a list from a port. This will read forms, recursively, until
-# it encounters the terminating ``)`` that closes the current list, or until it
-# encounters a ``.``, in which case it reads a trailing dotted pair.
-#
-# Under the hood, this method only reads the first token. If the list continues,
-# subsequent atoms are read using read_list_tail, which handles lists and dotted
-# pairs.
-def read_list(port, symbols):
-    head = read_token(port)
-    if head is None:
-        raise SyntaxError("Unexpected end of input")
-    if head == ')':
-        return list()
-    if head == '(':
-        return cons(
-            read_list(port, symbols),
-            read_list_tail(port, symbols),
-        )
-    return cons(
-        read_atom(head, port, symbols),
-        read_list_tail(port, symbols),
-    )
-
-# Reads the tail of a list from a port, recursively. This will read forms, until
-# it encounters either a ``)`` (which terminates the list) or a ``.`` (which
-# begins a terminating sequence of dotted pairs).
-def read_list_tail(port, symbols):
-    head = read_token(port)
-    if head is None:
-        raise SyntaxError("Unexpected end of input")
-    if head == ')':
-        return None
-    if head == '(':
-        return cons(
-            read_list(port, symbols),
-            read_list_tail(port, symbols),
-        )
-    if head == '.':
-        return read_cons_head(port, symbols)
-    return cons(
-        read_atom(head, port, symbols),
-        read_list_tail(port, symbols),
-    )
-
-# Reads the first atom after a dot, then delegates to ``read_cons_tail`` to read
-# the second. This generates a dotted pair out of the tail of the input.
-def read_cons_head(port, symbols):
-    head = read_token(port)
-    if head is None:
-        raise SyntaxError("Unexpected end of input")
-    if head == ')':
-        raise SyntaxError("Unexpected ')'")
-    if head == '(':
-        return read_cons_tail(
-            read_list(port, symbols),
-            port,
-            symbols,
-        )
-    return read_cons_tail(read_atom(head, port, symbols), port, symbols)
-
-# Reads the second form of a dotted pair from the input. This must either be a
-# terminating ``)``, or another dotted pair.
-def read_cons_tail(head, port, symbols):
-    tail = read_token(port)
-    if tail is None:
-        raise SyntaxError("Unexpected end of input")
-    if tail == ')':
-        return head
-    if tail == '.':
-        return cons(
-            head,
-            read_cons_head(port, symbols),
-        )
-    raise SyntaxError("Unexpected value after dotted pair")
+    stack = []
+    partial = None
+    while True:
+        token = read_token(port)
+        if token is None:
+            if stack:
+                raise SyntaxError("Unexpected end of input")
+            return EOF
+
+        state = partial.state if partial is not None else None
+        if state is in_list and token not in syntax_tokens:
+            # Most tokens are atoms inside a list: read them directly into it.
+            partial.forms.append(read_atom(token, symbols))
+            continue
+
+        if state is after_value:
+            # Only the end of the list, or another dot, may follow the form
+            # after a dot.
+            if token is dot:
+                partial.state = after_dot
+                continue
+            if token is not close_paren:
+                raise SyntaxError("Unexpected value after dotted pair")
+            form = partial.finish()
+            stack.pop()
+        elif token is close_paren:
+            if state is not in_list:
+                raise SyntaxError("Unexpected ')'")
+            form = partial.finish()
+            stack.pop()
+        elif token is open_paren:
+            partial = Partial(in_list)
+            stack.append(partial)
+            continue
+        elif token in quotes:
+            partial = Partial(symbols[quotes[token]])
+            stack.append(partial)
+            continue
+        elif token is dot and state is in_list and partial.forms:
+            partial.state = after_dot
+            continue
+        else:
+            form = read_atom(token, symbols)
+
+        # Add the finished form to the partial forms on the stack, finishing
+        # any quoted forms it completes along the way.
+        while stack:
+            partial = stack[-1]
+            if partial.quote is None:
+                break
+            form = list(partial.quote, form)
+            stack.pop()
+        else:
+            return form
+        if partial.state is after_dot:
+            partial.dotted.append(form)
+            partial.state = after_value
+        else:
+            partial.forms.append(form)
+
+# The names of the symbols introducing quoted forms, keyed by the quote token
+# abbreviating each.
+quotes = {
+    "'": 'quote',
+    "`": 'quasiquote',
+    ",": 'unquote',
+    ",@": 'unquote-splicing',
+}
+
+# Partial form states. A partial list is ``in_list`` until it reads a dot, which
+# must be followed by exactly one form (``after_dot``), after which it is
+# ``after_value`` until the list ends or another dot is read. A partial quoted
+# form is in the state named by its quote symbol, and is finished by the first
+# form read inside it.
+in_list = 'in-list'
+after_dot = 'after-dot'
+after_value = 'after-value'
+
+class Partial(object):
+    __slots__ = ('state', 'quote', 'forms', 'dotted')
+
+    def __init__(self, state):
+        self.state = state
+        # The quote symbol introducing this partial form, or None for lists.
+        self.quote = state if symbol_p(state) else None
+        self.forms = []
+        self.dotted = []
+
+    # Builds the finished list. Forms separated by dots, as in ``(a . b . c)``,
+    # form the list's improper tail, so this reads the same as ``(a b . c)``.
+    def finish(self):
+        if not self.dotted:
+            return list(*self.forms)
+        *dotted, result = self.dotted
+        for form in reversed([*self.forms, *dotted]):
+            result = cons(form, result)
+        return result
 
 # Converts an atom into its lisp representation, using the following priorities:
 #
@@ -116,34 +133,36 @@ def read_cons_tail(head, port, symbols):
 # * ``read_decimal``
 # * ``read_symbol`` in the current symbol table (which always succeeds)
 #
-# This also reconstructs quoted forms.
-#
 # The first reader to accept the string determines the type of the result.
-quotes = {
-    "'": 'quote',
-    "`": 'quasiquote',
-    ",": 'unquote',
-    ",@": 'unquote-splicing',
-}
-def read_atom(atom, port, symbols):
-    def read_as_first(val, *funcs):
-        for func in funcs:
-            result = func(val)
-            if result is not None:
-                return result
-
-    if atom in quotes:
-        quoted = read(port, symbols)
-        if quoted == EOF:
-            raise SyntaxError("Unexpected end of input")
-        return list(symbols[quotes[atom]], quoted)
-
+def read_atom(atom, symbols):
     if atom[0] == '"':
         return read_string(atom)
-    return read_as_first(
-        atom,
-        read_boolean,
-        read_integer,
-        read_decimal,
-        lambda val: read_symbol(val, symbols),
-    )
+    result = read_boolean(atom)
+    if result is not None:
+        return result
+    if may_be_number(atom):
+        result = read_number(atom)
+        if result is not None:
+            return result
+    return read_symbol(atom, symbols)
+
+# Reads an atom as an integer or a decimal, returning nil if it is neither.
+# Programs repeat the same numeric literals often, and both kinds of number are
+# immutable, so recently-read atoms are remembered along with their values.
+@functools.lru_cache(maxsize=4096)
+def read_number(atom):
+    result = read_integer(atom)
+    if result is not None:
+        return result
+    return read_decimal(atom)
+
+# True if an atom might be read as a number, by ``read_integer`` or
+# ``read_decimal``. Both only accept strings beginning with a digit, a sign, a
+# decimal point, an underscore, whitespace, or the start of ``Infinity``,
+# ``NaN``, or ``sNaN``. Checking the first character spares most symbols from
+# two failed parses, each of which raises and catches an exception.
+def may_be_number(atom):
+    first = atom[0]
+    return first.isdigit() or first in number_starts or first.isspace()
+
+number_starts = frozenset('+-._iInNsS')
@@ -1,63 +1,80 @@
-import operator as op
-import functools as f
+from functools import reduce as fold
+from operator import add, sub, mul, floordiv, truediv
 
 from .types import *
 from .builtin import Registry
 
 An = Registry()
 
+# Arithmetic is overwhelmingly called with exactly two operands, as in
+# ``(+ n 1)``, so the arithmetic builtins handle that case directly, and fold
+# any other number of operands.
+
 @An.fn
 def __add__(*vals):
-    return f.reduce(op.add, vals)
+    if len(vals) == 2:
+        return vals[0] + vals[1]
+    if vals:
+        return fold(add, vals)
+    return 0
 
 @An.fn
 def __sub__(val, *vals):
+    if len(vals) == 1:
+        return val - vals[0]
     if vals:
-        return f.reduce(op.sub, (val, *vals))
-    return op.neg(val)
+        return fold(sub, (val, *vals))
+    return -val
 
 @An.fn
 def __mul__(*vals):
-    return f.reduce(op.mul, vals)
+    if len(vals) == 2:
+        return vals[0] * vals[1]
+    return fold(mul, vals, 1)
 
 @An.fn
 def __floordiv__(*vals):
-    div = op.floordiv
-    if any(decimal_p(val) for val in vals):
-        div = op.truediv
-    return f.reduce(div, vals)
+    if len(vals) == 2:
+        a, b = vals
+        if decimal_p(a) or decimal_p(b):
+            return a / b
+        return a // b
+    for val in vals:
+        if decimal_p(val):
+            return fold(truediv, vals)
+    return fold(floordiv, vals)
 
 @An.fn
 def __eq__(a, b):
-    return op.eq(a, b)
+    return a == b
 
 @An.fn
 def __ne__(a, b):
-    return op.ne(a, b)
+    return a != b
 
 @An.fn
 def __lt__(a, b):
-    return op.lt(a, b)
+    return a < b
 
 @An.fn
 def __le__(a, b):
-    return op.le(a, b)
+    return a <= b
 
 @An.fn
 def __gt__(a, b):
-    return op.gt(a, b)
+    return a > b
 
 @An.fn
 def __ge__(a, b):
-    return op.ge(a, b)
+    return a >= b
 
 @An.fn
 def eq_p(a, b):
-    return op.is_(a, b)
+    return a is b
 
 @An.fn
 def equal_p(a, b):
-    return op.eq(a, b)
+    return a == b
 
 @An.fn
 def and_(*vals):
@@ -71,26 +88,20 @@ def or_(*vals):
 def not_(a):
     return not a
 
+# Expands ``(let ((NAME VALUE) ...) BODY ...)`` into nested lambda
+# applications, one per binding. The expansion is built from the innermost
+# binding outwards, looking up the symbols it needs once per expansion.
 def let(symbols, bindings, *body):
-    def beginify(*forms):
-        if len(forms) == 1:
-            form, = forms
-            return form
-        return list(symbols['begin'], *forms)
-
-    if nil_p(bindings):
-        return beginify(*body)
-
-    binding, bindings = uncons(bindings)
-    name, value = flatten(binding)
+    if len(body) == 1:
+        form, = body
+    else:
+        form = list(symbols['begin'], *body)
 
-    return list(
-        append(
-            list(symbols['lambda'], list(name)),
-            list(let(symbols, bindings, *body)),
-        ),
-        value
-    )
+    lambda_ = symbols['lambda']
+    for binding in reversed(flatten(bindings)):
+        name, value = flatten(binding)
+        form = list(list(lambda_, list(name), form), value)
+    return form
 
 @An.fn
 def concat(*strings):
@@ -112,4 +123,4 @@ def map(fn, vals):
 
 @An.fn
 def reduce(fn, vals):
-    return f.reduce(single_valued(fn), flatten(vals))
+    return fold(single_valued(fn), flatten(vals))
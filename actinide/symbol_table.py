@@ -1,7 +1,19 @@
 from .types import Symbol
+from .evaluator import special_forms
 
+# Interns symbols by name. Each symbol is numbered in the order it was interned,
+# starting from zero, and ``names`` maps those numbers back to names. The names
+# of the special forms are always interned first, in the order the evaluator
+# lists them, so that the evaluator can recognize special forms by number
+# alone.
 class SymbolTable(dict):
+    def __init__(self):
+        super().__init__()
+        self.names = []
+        for name in special_forms:
+            self[name]
+
     def __missing__(self, key):
-        self[key] = result = Symbol(key)
+        self[key] = result = Symbol(key, len(self.names))
+        self.names.append(key)
         return result
-
@@ -1,14 +1,9 @@
 # ## Actinide Types
 
 import builtins as b
-from collections import namedtuple
+import itertools
 from decimal import Decimal, InvalidOperation
 
-# Circular import. Hard to avoid: Procedure calls `eval`, `eval` calls
-# `lambda_`, `lambda_` eventually calls `Procedure`. We indirect the call
-# through the module object to avoid problems with import order.
-from . import evaluator as e
-
 from .environment import *
 from .builtin import Registry
 
@@ -38,12 +33,10 @@ false = An.bind('#f', False)
 def boolean_p(value):
     return value is true or value is false
 
+boolean_literals = {'#t': true, '#f': false}
+
 def read_boolean(value):
-    if value == '#t':
-        return true
-    if value == '#f':
-        return false
-    return None
+    return boolean_literals.get(value)
 
 def display_boolean(value):
     return '#t' if value else '#f'
@@ -102,7 +95,7 @@ def string(value):
 
 @An.fn
 def string_p(value):
-    return not symbol_p(value) and isinstance(value, str)
+    return isinstance(value, str)
 
 def read_string(value):
     value = value[1:-1]
@@ -118,13 +111,17 @@ def display_string(value):
 # ### Symbols
 #
 # Short, interned strings used as identifiers. Interning is handled by a
-# SymbolTable.
+# SymbolTable, which also numbers its symbols with small, contiguous ids.
+#
+# Symbols compare and hash by identity: two symbols from the same table are
+# equal only if they are the same symbol.
 
 class Symbol(object):
-    def __init__(self, value):
+    __slots__ = ('value', 'id')
+
+    def __init__(self, value, id=None):
         self.value = value
-    def __hash__(self):
-        return hash(self.value)
+        self.id = id
     def __str__(self):
         return self.value
     def __repr__(self):
@@ -138,8 +135,20 @@ def symbol(string, symbol_table):
 def symbol_p(value):
     return isinstance(value, Symbol)
 
+# Symbols which are not interned in any symbol table, and so are distinct from
+# every other symbol. These are never added to a symbol table, so generating
+# many of them (say, one per macro expansion) does not grow the table.
+gensyms = itertools.count()
+
+@An.fn
+def gensym():
+    return Symbol(f'#<gensym-{next(gensyms)}>')
+
+# Symbol tables are dicts, and only fall back to Python code (``__missing__``)
+# the first time a name is seen, so this indexes the table directly rather than
+# going through ``symbol``.
 def read_symbol(value, symbol_table):
-    return symbol(value, symbol_table)
+    return symbol_table[value]
 
 def display_symbol(value):
     return str(value)
@@ -148,7 +157,40 @@ def display_symbol(value):
 #
 # Pairs.
 
-Cons = namedtuple('Cons', 'head tail')
+# Conses compare and hash by value, like the tuples they replaced. Both walk
+# the tails of a list in a loop, so comparing long lists doesn't recurse once
+# per element.
+class Cons(object):
+    __slots__ = ('head', 'tail')
+
+    def __init__(self, head, tail):
+        self.head = head
+        self.tail = tail
+
+    def __eq__(self, other):
+        if not isinstance(other, Cons):
+            return NotImplemented
+        left, right = self, other
+        while isinstance(left, Cons) and isinstance(right, Cons):
+            if left is right:
+                return True
+            if left.head != right.head:
+                return False
+            left, right = left.tail, right.tail
+        if isinstance(left, Cons) or isinstance(right, Cons):
+            return False
+        return left == right
+
+    def __hash__(self):
+        heads = []
+        value = self
+        while isinstance(value, Cons):
+            heads.append(value.head)
+            value = value.tail
+        return hash((Cons, *heads, value))
+
+    def __repr__(self):
+        return f'Cons({self.head!r}, {self.tail!r})'
 
 @An.fn
 def cons(head, tail):
@@ -172,61 +214,75 @@ def uncons(cons):
 
 def display_cons(value, symbols):
     parts = []
-    while cons_p(value):
-        parts.append(display(head(value), symbols))
-        value = tail(value)
-    if not nil_p(value):
+    while isinstance(value, Cons):
+        parts.append(display(value.head, symbols))
+        value = value.tail
+    if value is not None:
         parts.append('.')
         parts.append(display(value, symbols))
     return '(' + ' '.join(parts) + ')'
 
 # ### Lists
 
+# Lists are built, checked, and copied by walking their conses in loops, rather
+# than by recursing once per element, so that long lists don't exhaust the
+# Python stack. These loops use conses' attributes and constructor directly,
+# rather than the ``head``, ``tail``, and ``cons`` functions, which would cost a
+# call per element.
+
 @An.fn
 def list(*elems):
-    if elems:
-        head, *tail = elems
-        return cons(head, list(*tail))
-    else:
-        return nil
+    result = nil
+    for elem in reversed(elems):
+        result = Cons(elem, result)
+    return result
 
 @An.fn
 def list_p(value):
-    return nil_p(value) or cons_p(value) and list_p(tail(value))
+    while isinstance(value, Cons):
+        value = value.tail
+    return value is None
 
 @An.fn
 def append(list, *lists):
     if not lists:
         return list
-    if nil_p(list):
-        return append(*lists)
-    value, next = head(list), tail(list)
-    return cons(value, append(next, *lists))
+    *prefixes, result = (list, *lists)
+    for prefix in reversed(prefixes):
+        for value in reversed(flatten(prefix)):
+            result = Cons(value, result)
+    return result
 
 @An.fn
 def length(list):
     l = 0
-    while not nil_p(list):
+    while list is not None:
         l += 1
-        list = tail(list)
+        list = list.tail
     return l
 
 def flatten(list):
     r = []
-    while not nil_p(list):
-        r.append(head(list))
-        list = tail(list)
+    while list is not None:
+        r.append(list.head)
+        list = list.tail
     return r
 
 # ### Vectors
+#
+# Vectors are Python lists, of a dedicated subclass, so that the lists the
+# interpreter and host programs use internally are never mistaken for vectors.
+
+class Vector(b.list):
+    __slots__ = ()
 
 @An.fn
 def vector(*elems):
-    return b.list(elems)
+    return Vector(elems)
 
 @An.fn
 def vector_p(value):
-    return isinstance(value, b.list)
+    return isinstance(value, Vector)
 
 @An.fn
 def vector_to_list(value):
@@ -234,7 +290,7 @@ def vector_to_list(value):
 
 @An.fn
 def list_to_vector(value):
-    return flatten(list)
+    return Vector(flatten(value))
 
 @An.fn
 def vector_length(value):
@@ -262,38 +318,36 @@ def display_vector(value, symbols):
 class ProcedureError(Exception):
     pass
 
-class Procedure(object):
-    def __init__(self, body, formals, environment, macros, symbols):
-        self.environment = environment
-        self.macros = macros
-        self.symbols = symbols
+# The compiled form of a lambda expression. Compiling a procedure's body is
+# comparatively expensive, so it happens once, when the lambda expression is
+# itself compiled, and every procedure created by evaluating that expression
+# shares the result.
+class Lambda(object):
+    __slots__ = (
+        'body',
+        'symbols',
+        'formals',
+        'tail_formal',
+        'scope',
+        'defines_macros',
+        'continuation',
+    )
+
+    def __init__(self, body, formals, symbols, scope=None):
         self.body = body
-        self.continuation = self.compile()
+        self.symbols = symbols
         self.formals, self.tail_formal = self.parse_formals(formals)
+        self.scope = e.Scope(
+            self.formals,
+            self.tail_formal,
+            e.defined_names(body),
+            scope,
+        )
+        self.defines_macros = e.defines_macros(body)
+        self.continuation = self.compile()
 
     def compile(self, continuation=None):
-        return e.eval(self.body, self.symbols, continuation)
-
-    def invocation_environment(self, *args):
-        if b.len(args) < b.len(self.formals) or \
-            b.len(args) > b.len(self.formals) and not self.tail_formal:
-            args_syntax = append(list(*self.formals), self.tail_formal)
-            call_syntax = list(*args)
-            raise ProcedureError(f'Procedure with arguments {display(args_syntax, self.symbols)} called with arguments {display(call_syntax, self.symbols)}')
-
-        named_args = b.list(zip(self.formals, args))
-        tail_arg = []
-        if self.tail_formal:
-            tail_list = list(*args[b.len(self.formals):])
-            tail_binding = (self.tail_formal, tail_list)
-            tail_arg.append(tail_binding)
-
-        return Environment(named_args + tail_arg, self.environment)
-
-    def __call__(self, *args):
-        call_env = self.invocation_environment(*args)
-        call_macros = Environment(parent=self.macros)
-        return e.run(self.continuation, call_env, call_macros, ())
+        return e.eval(self.body, self.symbols, continuation, self.scope)
 
     @classmethod
     def parse_formals(cls, formals):
@@ -303,21 +357,69 @@ class Procedure(object):
             names.append(formal)
         return names, formals
 
+# A procedure: a compiled lambda expression, closed over the environment (and
+# macro environment) it was evaluated in.
+class Procedure(object):
+    __slots__ = ('code', 'environment', 'macros', 'continuation')
+
+    def __init__(self, code, environment, macros):
+        self.code = code
+        self.environment = environment
+        self.macros = macros
+        self.continuation = code.continuation
+
+    # Builds the frame for a call to this procedure with a sequence of
+    # arguments.
+    def invocation_environment(self, args):
+        code = self.code
+        count = b.len(code.formals)
+        if code.tail_formal:
+            if b.len(args) < count:
+                raise self.arity_error(args)
+            values = [*args[:count], list(*args[count:]), *code.scope.unbound]
+        elif b.len(args) == count:
+            values = [*args, *code.scope.unbound]
+        else:
+            raise self.arity_error(args)
+
+        return Frame(code.scope, values, self.environment)
+
+    def arity_error(self, args):
+        code = self.code
+        args_syntax = append(list(*code.formals), code.tail_formal)
+        call_syntax = list(*args)
+        return ProcedureError(f'Procedure with arguments {display(args_syntax, code.symbols)} called with arguments {display(call_syntax, code.symbols)}')
+
+    def __call__(self, *args):
+        call_env = self.invocation_environment(args)
+        call_macros = self.macros
+        if self.code.defines_macros:
+            call_macros = Environment(parent=call_macros)
+        return e.run(self.continuation, call_env, call_macros, ())
+
 @An.fn
 def procedure_p(value):
     return callable(value)
 
 def display_procedure(proc, symbols):
     if isinstance(proc, Procedure):
-        formals = display(append(list(*proc.formals), proc.tail_formal), symbols)
-        body = display(proc.body, symbols)
+        code = proc.code
+        formals = display(append(list(*code.formals), code.tail_formal), symbols)
+        body = display(code.body, symbols)
         return f'<procedure: (lambda {formals} {body})>'
     return f'<builtin: {proc.__name__}>'
 
 # ### General-purpose functions
 
 # Bind manually, fixing the symbol table at the bind site
+#
+# Most values are displayed by looking up the display function for their exact
+# type, in ``display_types`` (below). Values of other types, such as
+# subclasses of the built-in types, work through the type predicates in turn.
 def display(value, symbols):
+    display_type = display_types.get(type(value))
+    if display_type is not None:
+        return display_type(value, symbols)
     if quote_p(value, symbols):
         return display_quote(value, symbols)
     if cons_p(value):
@@ -341,21 +443,53 @@ def display(value, symbols):
     # Give up and use repr to avoid printing `None`.
     return repr(value)
 
+# The prefixes abbreviating quoted forms, keyed by the name of the symbol
+# introducing each.
+quote_prefixes = {
+    'quote': "'",
+    'quasiquote': '`',
+    'unquote': ',',
+    'unquote-splicing': ',@',
+}
+
+# Checks the head's name first, so lists which don't begin with one of the
+# quote symbols - nearly all of them - cost one dict lookup at most.
 def quote_p(value, symbols):
-    return cons_p(value) and head(value) in [
-        symbols[q]
-        for q in ['quote', 'quasiquote', 'unquote', 'unquote-splicing']
-    ]
+    if not isinstance(value, Cons):
+        return False
+    quote = value.head
+    if not isinstance(quote, Symbol) or quote.value not in quote_prefixes:
+        return False
+    return quote is symbols[quote.value]
 
 def display_quote(value, symbols):
     quote, form = flatten(value)
-    if quote == symbols['quote']:
-        return "'" + display(form, symbols)
-    if quote == symbols['quasiquote']:
-        return "`" + display(form, symbols)
-    if quote == symbols['unquote']:
-        return "," + display(form, symbols)
-    if quote == symbols['unquote-splicing']:
-        return ",@" + display(form, symbols)
-    # emergency fallback
+    return quote_prefixes[quote.value] + display(form, symbols)
+
+def display_list(value, symbols):
+    if quote_p(value, symbols):
+        return display_quote(value, symbols)
     return display_cons(value, symbols)
+
+# Display functions, keyed by the exact type of value each displays. Each
+# receives the value and the symbol table.
+display_types = {
+    Cons: display_list,
+    Symbol: lambda value, symbols: display_symbol(value),
+    str: lambda value, symbols: display_string(value),
+    type(None): lambda value, symbols: display_nil(value),
+    bool: lambda value, symbols: display_boolean(value),
+    # Numbers display as Python formats them (see ``display_integer`` and
+    # ``display_decimal``), which needs no further call.
+    int: lambda value, symbols: str(value),
+    Decimal: lambda value, symbols: str(value),
+    Procedure: display_procedure,
+    Vector: display_vector,
+}
+
+# Circular import. Hard to avoid: Procedure calls `eval`, `eval` calls
+# `lambda_`, `lambda_` eventually calls `Procedure`. We indirect the call
+# through the module object to avoid problems with import order. The evaluator
+# dispatches on the types defined above as soon as it is loaded, so this import
+# comes last, once they exist.
+from . import evaluator as e
@@ -1,5 +1,6 @@
 from hypothesis import given, event
 
+import actinide
 from actinide.evaluator import *
 from actinide.environment import *
 from actinide.types import *
@@ -17,3 +18,25 @@ def test_evaluator(program_result):
     assert run(eval(program, symbol_table, None), environment, macros) == result
     for symbol, value in bindings:
         assert environment[symbol] == value
+
+# * Does a begin form reduce to the values of its final subform?
+def test_begin_final_values():
+    s = actinide.Session()
+    assert (2, 3) == s.run('(begin 1 (values 2 3))')
+    assert () == s.run('(begin 1 (values))')
+
+# * Does an application whose function position yields several values apply
+#   the first of them to the rest?
+def test_multiple_valued_operator():
+    s = actinide.Session()
+    assert (3,) == s.run('((values + 1) 2)')
+    s.run('(define (two) (values + 1))')
+    assert (3,) == s.run('((two) 2)')
+
+# * Does + accept any number of operands of any addable type?
+def test_add_operands():
+    s = actinide.Session()
+    assert (0,) == s.run('(+)')
+    assert (6,) == s.run('(+ 1 2 3)')
+    assert ('a',) == s.run('(+ "a")')
+    assert ('abc',) == s.run('(+ "a" "b" "c")')
@@ -34,3 +34,15 @@ def test_shorter_qq_expansion():
     program = s.read('`(,a b)`')
     expansion = s.expand(program)
     assert s.read("(cons a (cons 'b ()))") == expansion
+
+def test_repeated_subform_expansion():
+    s = actinide.Session()
+    calls = []
+    @s.macro_bind_fn
+    def count():
+        calls.append(None)
+        return len(calls)
+    s.run('(define-macro (twice form) `(values ,form ,form))')
+
+    assert (3, 3) == s.run('(twice (+ 1 2))')
+    assert (1, 2) == s.run('(twice (count))')
@@ -1,3 +1,5 @@
+import actinide
+
 from hypothesis import given
 from hypothesis.strategies import text
 
@@ -26,3 +28,22 @@ def test_reader_with_trailing(form, text):
 
     assert read(port, symbol_table) == form
     assert read_port_fully(port) == text
+
+# * Can the reader read forms nested more deeply than Python can recurse?
+def test_reader_deeply_nested():
+    depth = 10000
+    port = string_to_input_port('(' * depth + ')' * depth)
+
+    form = read(port, symbol_table)
+    for _ in range(depth - 1):
+        form, rest = uncons(form)
+        assert rest == nil
+    assert form == nil
+
+# * Does reading the same source twice produce equal, but distinct, forms?
+def test_reader_fresh_forms():
+    s = actinide.Session()
+    first, second = s.read('(a b)'), s.read('(a b)')
+
+    assert first == second
+    assert first is not second
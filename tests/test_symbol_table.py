@@ -0,0 +1,14 @@
+from hypothesis import given
+from hypothesis.strategies import text
+
+from actinide.symbol_table import *
+
+# Symbols are compared by identity, so interning the same name twice must
+# produce the same symbol.
+@given(text())
+def test_interning(name):
+    symbols = SymbolTable()
+    symbol = symbols[name]
+
+    assert symbols[name] is symbol
+    assert symbols.names[symbol.id] == name
@@ -1,4 +1,7 @@
+import io
+
 from hypothesis import given
+from pytest import raises
 
 from actinide.tokenizer import *
 from actinide.ports import *
@@ -22,11 +25,17 @@ def test_tokenizer_no_token(input):
 
     assert read_token(port) == None
 
+# * empty input: reads back None.
+def test_tokenizer_empty_input():
+    port = string_to_input_port('')
+
+    assert read_token(port) == None
+
 # * any sequence of separator-token pairs: if the pairs are coalesced into a
 #   single giant input, does the tokenizer recover the tokens?
 @given(spaced_token_sequences())
 def test_tokenizer_spaced_sequence(spaced_tokens):
-    input = ''.join(''.join(pair) for pair in spaced_tokens)
+    input = ''.join(part for pair in spaced_tokens for part in pair)
     tokens = [token for (_, token) in spaced_tokens]
 
     port = string_to_input_port(input)
@@ -38,3 +47,11 @@ def test_tokenizer_spaced_sequence(spaced_tokens):
 
     assert list(iterate_read_token(port)) == tokens
 
+# * a string with an invalid escape, followed by more input: reports the escape
+#   without reading past the line containing it.
+def test_tokenizer_invalid_escape():
+    port = Port(io.StringIO('"\\q"\n(+ 3 4)\n"ok"\n'))
+
+    with raises(TokenError):
+        read_token(port)
+    assert port.file.read() == '(+ 3 4)\n"ok"\n'
@@ -1,4 +1,4 @@
-from hypothesis.strategies import just, one_of, characters, text, lists, tuples
+from hypothesis.strategies import just, one_of, sampled_from, characters, text, lists, tuples
 from hypothesis.strategies import composite, recursive
 
 from actinide import tokenizer as t
@@ -7,15 +7,10 @@ from actinide import tokenizer as t
 
 # Generates the `(` and ')' tokens.
 def parens():
-    return one_of(just(p) for p in t.parens)
+    return sampled_from(t.parens)
 
 def quotes():
-    return one_of(
-        just("'"),
-        just('`'),
-        just(','),
-        just(',@'),
-    )
+    return sampled_from(["'", '`', ',', ',@'])
 
 # Generates characters that are legal, unescaped, inside of a string.
 def string_bare_characters():
@@ -23,24 +18,29 @@ def string_bare_characters():
 
 # Generates legal string escape sequences.
 def string_escaped_characters():
-    return one_of(just(c) for c in t.string_escaped).map(lambda c: '\\' + c)
+    return sampled_from(['\\' + c for c in t.string_escaped])
 
 # Generates single-character string representations, including escapes.
 def string_characters():
     return one_of(string_bare_characters(), string_escaped_characters())
 
 # Generates arbitrary string bodies (strings, without leading or trailing
-# quotes)
+# quotes). Escape sequences are two characters long, so the body is joined from
+# a list of string characters rather than drawn with ``text``, which only
+# accepts single characters.
 def string_body():
-    return text(string_characters())
+    return lists(string_characters()).map(''.join)
 
 # Generates legal strings.
 def strings():
     return tuples(just('"'), string_body(), just('"')).map(lambda t: ''.join(t))
 
+# Characters which end a symbol.
+symbol_delimiters = t.whitespace + t.parens + t.quotes + t.string_delim + t.comment_delim
+
 # Generates characters which are legal within a symbol.
 def symbol_characters():
-    return characters(blacklist_characters=t.whitespace + t.parens + t.quotes + t.string_delim + t.comment_delim)
+    return characters(blacklist_characters=symbol_delimiters)
 
 # Generates legal symbols.
 def symbols():
@@ -48,15 +48,15 @@ def symbols():
 
 # Generates single whitespace characters.
 def whitespace_characters():
-    return one_of(just(c) for c in t.whitespace)
+    return sampled_from(t.whitespace)
 
 # Generates a single token.
 def tokens():
     return one_of(symbols(), strings(), parens(), quotes())
 
-# Generates a string which may not be empty, but which does not contain a token.
+# Generates a non-empty string which does not contain a token.
 def nontokens():
-    return one_of(whitespace(), comments(), just(''))
+    return one_of(whitespace(), comments())
 
 # Generates at least one character of whitespace.
 def whitespace():